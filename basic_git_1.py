@@ -1,11 +1,34 @@
-import argparse
 import hashlib
+import io
 import os
 import sys
+import tempfile
 import time
 
 
 class BasicGit:
+    # An empty SHA-1 hasher, set up once. Copying it with '.copy()' is cheaper
+    # than creating a brand-new hasher for every object we hash. We only use
+    # SHA-1 as a content ID, so 'usedforsecurity=False' keeps hashlib on its
+    # fast OpenSSL-backed implementation even on security-restricted systems.
+    _SHA1_TEMPLATE = hashlib.sha1(usedforsecurity=False)
+
+    # Every attribute set in __init__ is listed here, so instances store them in
+    # fixed slots instead of a per-instance '__dict__'. Add new attributes here too.
+    __slots__ = (
+        "root_path",
+        "gitdir",
+        "refs_dir",
+        "heads_dir",
+        "HEAD_file",
+        "main_branch",
+        "main_branch_path",
+        "objects_dir",
+        "index_file",
+        "_known_objects",
+        "_known_shards",
+    )
+
     def __init__(self, root_path="."):
         """
         Set up a Git-like system to track changes to files.
@@ -27,12 +50,17 @@ class BasicGit:
             self.gitdir, "HEAD"
         )  # file indicating the currently active branch
         self.main_branch = "main"  # the default name for the initial branch
+        self.main_branch_path = os.path.join(
+            self.heads_dir, self.main_branch
+        )  # file storing the latest commit on the main branch, built once and reused
         self.objects_dir = os.path.join(
             self.gitdir, "objects"
         )  # directory to store all committed objects
         self.index_file = os.path.join(
             self.gitdir, "index"
         )  # file to (temporarily) track staged files
+        self._known_objects = set()  # hashes found in the object database so far
+        self._known_shards = set()  # two-character object folders known to exist
 
     def init(self) -> None:
         """
@@ -41,100 +69,251 @@ class BasicGit:
         This command sets up the necessary directory structure (.basicgit1)
         to begin tracking changes in the current directory.
         """
-        # --- Task 1.1: Check if the repository directory exists ---
-        # Check if the main repository directory already exists
-        # If it does, print a message and stop the initialization.
-        gitdir_exists = None # YOUR CODE HERE
-        if gitdir_exists is None:
-            raise NotImplementedError(
-                "Task 1.1: Checking if the main repository directory exists is not implemented."
-            )
-        if gitdir_exists:
+        # --- Task 1.1: Create the main repository directory ---
+        # Create the main repository directory with 'os.mkdir()'. If it already
+        # exists, 'os.mkdir()' raises 'FileExistsError', which tells us the
+        # repository is already there - no separate existence check needed.
+        try:
+            os.mkdir(None)  # YOUR CODE HERE - Replace None
+        except FileExistsError:
             print(f"Repository already exists at {self.gitdir}")
             return
+        except TypeError as e:
+            raise NotImplementedError(
+                f"Task 1.1: Creating the main repository directory encountered an error: {e}"
+            )
 
         # --- Task 1.2: Create repository directories ---
         # Establish the foundational directory structure for the repository, ensuring that if a directory already exists, no error is raised.
+        # 'os.makedirs' also creates any missing parent directories, so creating the
+        # heads directory creates the main repository and refs directories as well.
         # Hint: reference the __init__ method
-        os.makedirs(None, exist_ok=True)  # YOUR CODE HERE - Create the main repository directory
+        os.makedirs(None, exist_ok=True)  # YOUR CODE HERE - Create the heads directory (and its parents)
         os.makedirs(None, exist_ok=True)  # YOUR CODE HERE - Create the objects directory
-        os.makedirs(None, exist_ok=True)  # YOUR CODE HERE - Create the heads directory
 
         # --- Task 1.3: Create the HEAD file ---
         # Create a 'HEAD' file in the repository's directory.
         # Write the path to the main branch's head reference (e.g., "refs/heads/<main/master branch name>") into this file.
-        with open(None, "w") as f: # YOUR CODE HERE - Replace None
-            f.write(None) # YOUR CODE HERE - Replace None
+        # Hint: use 'self._write_small()', which takes the content as bytes.
+        self._write_small(None, None) # YOUR CODE HERE - Replace None
 
         # --- Task 1.4: Create the main branch file ---
         # Create a file representing the main branch (e.g., 'main' or 'master')
         # within the branch references directory ('self.heads_dir'). This file
         # will eventually store the commit hash of the latest commit on this branch.
         # Initialize this file as empty, indicating no commits yet.
-        main_branch_path = os.path.join(None, None) # YOUR CODE HERE - Construct the path to the main branch file
+        # Hint: its path is already built in the __init__ method.
         try:
-            with open(None, "w") as f: # YOUR CODE HERE - Open the main branch file in write mode
-                f.write("")  # Start with no commits
+            self._write_small(None, b"")  # YOUR CODE HERE - Start with no commits
         except Exception as e:
             raise NotImplementedError(
                 f"Task 1.4: Creating the main branch file encountered an error: {e}"
             )
 
         # Create an empty index file to track staged files
-        with open(self.index_file, "w") as f:
-            f.write("")
+        self._write_small(self.index_file, b"")
 
         print(f"Initialized empty repository in {self.gitdir}")
 
-    def _hash_object(self, data: str) -> str:
+    def _write_small(self, path: str, data: bytes) -> None:
         """
-        Generate a unique ID (SHA-1 hash) for the provided data.
+        Write a few bytes to a file, replacing anything already in it.
 
-        This private helper method takes string data, encodes it, and then
-        computes its SHA-1 hash, returning the hexadecimal representation
-        of the hash.
+        The repository's bookkeeping files (HEAD, branch references and the
+        index) only ever hold a short line of text. This private helper writes
+        them with 'os.open' and 'os.write' directly, skipping the buffering and
+        text-encoding layers that 'open()' sets up for every file.
 
         Args:
-            data (str): The string data to be hashed.
+            path (str): The path to the file to be written.
+            data (bytes): The bytes to write into the file.
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(path, flags, 0o644)
+        try:
+            self._write_all(fd, data)
+        finally:
+            os.close(fd)
+
+    def _write_all(self, fd: int, data: bytes) -> None:
+        """
+        Write every byte of 'data' to an open file descriptor.
+
+        'os.write' is allowed to write fewer bytes than it was given (for
+        example when a signal interrupts it) and returns how many it managed.
+        This private helper keeps calling it with the rest until nothing is
+        left, so a file is never silently cut short.
+
+        Args:
+            fd (int): A file descriptor opened for writing.
+            data (bytes): The bytes to write.
+        """
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+
+    def _read_small(self, path: str) -> bytes:
+        """
+        Read the whole of a small file as bytes.
+
+        This is the reading counterpart of '_write_small': one 'os.open', one
+        'os.read' sized from the file's length, and one 'os.close', with no
+        buffering or text-decoding layers in between.
+
+        Args:
+            path (str): The path to the file to be read.
 
         Returns:
-            str: The hexadecimal representation of the SHA-1 hash.
+            bytes: The file's contents.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
         """
-        # --- Task 3.1: Encode data to bytes ---
-        # The 'hashlib' library requires bytes. Encode the input 'data' using UTF-8
-        # and store the result in 'encoded_data'.
-        encoded_data = None # YOUR CODE HERE
-        if encoded_data is None:
-            raise NotImplementedError(
-                "Task 3.1: Encode the data to bytes using UTF-8."
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            return os.read(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+
+    def _replace_small(self, path: str, data: bytes) -> None:
+        """
+        Replace a small file all at once, so readers never see it half-written.
+
+        The new bytes go to a '.lock' file next to the target first, and
+        'os.replace' then swaps it into place in one step. If the program stops
+        part-way, the old file is still intact (real Git updates its branch
+        references the same way). The lock file is created with 'os.O_EXCL',
+        so while one process holds it, another one trying to update the same
+        file fails instead of silently overwriting its work.
+
+        Args:
+            path (str): The path to the file to be replaced.
+            data (bytes): The bytes the file should contain.
+
+        Raises:
+            FileExistsError: If the '.lock' file already exists, because
+                another process is updating the same file (or one crashed
+                and left its lock file behind).
+        """
+        lock_path = f"{path}.lock"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+        try:
+            fd = os.open(lock_path, flags, 0o644)
+        except FileExistsError:
+            raise FileExistsError(
+                f"Unable to create '{lock_path}': another process seems to be "
+                "updating it. If not, remove the file and try again."
             )
+        try:
+            self._write_all(fd, data)
+        except BaseException:
+            os.close(fd)
+            os.remove(lock_path)  # release the lock
+            raise
+        os.close(fd)
+        os.replace(lock_path, path)
+
+    def _hash_object(self, data: bytes) -> str:
+        """
+        Generate a unique ID (SHA-1 hash) for the provided data.
+
+        This private helper method takes raw bytes and computes their SHA-1
+        hash, returning the hexadecimal representation of the hash.
 
-        # --- Task 3.2: Compute SHA-1 hash as hexadecimal ---
-        # Use 'hashlib.sha1()' to hash 'encoded_data'. Then, get the hex digest
-        # using '.hexdigest()' and store it in 'hex_hash'.
+        Args:
+            data (bytes): The bytes to be hashed.
+
+        Returns:
+            str: The hexadecimal representation of the SHA-1 hash.
+        """
+        # --- Task 3.1: Compute SHA-1 hash as hexadecimal ---
+        # Make a SHA-1 hasher by calling '.copy()' on 'self._SHA1_TEMPLATE', then
+        # feed it 'data' with '.update()'. Get the hex digest using '.hexdigest()'
+        # and store it in 'hex_hash'.
         hash_object = None # YOUR CODE HERE
         hex_hash = None # YOUR CODE HERE
         if hex_hash is None:
             raise NotImplementedError(
-                "Task 3.2: Compute the SHA-1 hash and return its hexadecimal representation."
+                "Task 3.1: Compute the SHA-1 hash and return its hexadecimal representation."
             )
         return hex_hash
 
-    def _store_object(self, data: str, sha: str) -> None:
+    def _hash_and_store_file(self, src: io.BufferedIOBase) -> str:
         """
-        Store data in the object database using its SHA-1 hash.
+        Hash a file and store it in the object database in a single pass.
 
-        This private helper method saves the provided data into a file within
-        the repository's object directory. The file's name is based on the
-        SHA-1 hash of the data, and the objects are organized into subdirectories
-        based on the first two characters of the hash for efficiency.
+        This private helper method reads an open binary file one fixed-size
+        chunk at a time. Each chunk is fed into a SHA-1 hasher and written to a
+        temporary file inside the object directory at the same time, so the
+        content is only walked once. When the hash is known, the temporary
+        file is renamed to its final object path (from '_object_paths', the
+        same helper '_store_object' uses). If that object already exists, the
+        temporary file is simply discarded.
+
+        This first version keeps to one plain read loop for files of every
+        size. Memory-mapping large files is left to basic_git_2.py.
 
         Args:
-            data (str): The string data to be stored.
-            sha (str): The SHA-1 hash of the data, used as the filename.
+            src (io.BufferedIOBase): The file to be hashed and stored, opened in binary mode.
+
+        Returns:
+            str: The hexadecimal representation of the SHA-1 hash.
+        """
+        # --- Task 3.2: Make a hasher for the file ---
+        # Make a SHA-1 hasher the same way as in Task 3.1 and store it in 'hasher'.
+        # The loop below feeds it the file one chunk at a time with '.update()':
+        # feeding the chunks one after another gives the same hash as feeding
+        # the whole file at once, so the file never has to fit in memory.
+        hasher = None # YOUR CODE HERE
+        if hasher is None:
+            raise NotImplementedError("Task 3.2: Making a SHA-1 hasher for the file is not implemented.")
+
+        chunk_size = 1 << 20  # 1 MiB
+        buffer = bytearray(chunk_size)  # reused for every chunk
+        view = memoryview(buffer)
+        with tempfile.NamedTemporaryFile(dir=self.objects_dir, delete=False) as tmp:
+            # Fill the buffer until the end of the file is reached
+            while n := src.readinto(buffer):
+                hasher.update(view[:n])
+                tmp.write(view[:n])
+        sha = hasher.hexdigest()
+
+        try:
+            obj_dir, obj_path = self._object_paths(sha)
+        except NotImplementedError:
+            os.remove(tmp.name)  # don't leave the temporary file behind
+            raise
+        if self._have_object(sha):
+            # Same content is already stored, so there is nothing to keep
+            os.remove(tmp.name)
+            return sha
+        self._ensure_shard(obj_dir, sha[:2])
+        # Temporary files are private to their owner; give the object the same
+        # permissions as the other repository files, then move it into place
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, obj_path)
+        self._known_objects.add(sha)
+        return sha
+
+    def _object_paths(self, sha: str) -> tuple[str, str]:
+        """
+        Work out where an object is stored in the object database.
+
+        Objects are organized into subdirectories named after the first two
+        characters of their hash, and the rest of the hash is the file name.
+
+        Args:
+            sha (str): The SHA-1 hash of the object.
+
+        Returns:
+            tuple[str, str]: The object's directory ('objects/xx') and the
+                full path of its file ('objects/xx/yyyy...').
         """
         # --- Task 4.1: Construct the object directory path ---
         # Use 'self.objects_dir' and the first two characters of 'sha'.
+        # Hint: the hash only contains hex characters, so gluing the parts together
+        # with 'os.sep' in an f-string is enough - 'os.path.join' does extra work
+        # we don't need here.
         obj_dir = None # YOUR CODE HERE
         if obj_dir is None:
             raise NotImplementedError("Task 4.1: Constructing the object directory path is not implemented.")
@@ -144,10 +323,66 @@ class BasicGit:
         obj_path = None # YOUR CODE HERE
         if obj_path is None:
             raise NotImplementedError("Task 4.2: Constructing the object file path is not implemented.")
+        return obj_dir, obj_path
+
+    def _have_object(self, sha: str) -> bool:
+        """
+        Check whether an object is already stored in the object database.
+
+        Each hash is looked up with a single 'os.path.exists' call on its
+        object path. Hashes that are found are remembered, so asking about the
+        same object again is a quick in-memory lookup.
+
+        Args:
+            sha (str): The SHA-1 hash of the object to look for.
+
+        Returns:
+            bool: True if the object is already stored, False otherwise.
+        """
+        if sha in self._known_objects:
+            return True
+        if os.path.exists(self._object_paths(sha)[1]):
+            self._known_objects.add(sha)
+            return True
+        return False
+
+    def _ensure_shard(self, obj_dir: str, shard: str) -> None:
+        """
+        Make sure an object folder ('objects/xx') exists.
+
+        There are only 256 possible two-character folders, so after the first
+        object lands in a folder, later objects can skip the file system call
+        that would create it.
+
+        Args:
+            obj_dir (str): The full path of the object folder.
+            shard (str): The folder name (the first two characters of a hash).
+        """
+        if shard not in self._known_shards:
+            os.makedirs(obj_dir, exist_ok=True)
+            self._known_shards.add(shard)
+
+    def _store_object(self, data: bytes, sha: str) -> None:
+        """
+        Store data in the object database using its SHA-1 hash.
+
+        This private helper method saves the provided data into a file within
+        the repository's object directory. The file's name is based on the
+        SHA-1 hash of the data, and the objects are organized into subdirectories
+        based on the first two characters of the hash for efficiency.
+
+        Args:
+            data (bytes): The raw bytes to be stored.
+            sha (str): The SHA-1 hash of the data, used as the filename.
+        """
+        if self._have_object(sha):
+            return  # identical content is already stored
 
-        os.makedirs(obj_dir, exist_ok=True)
-        with open(obj_path, "w") as f:
+        obj_dir, obj_path = self._object_paths(sha)
+        self._ensure_shard(obj_dir, sha[:2])
+        with open(obj_path, "wb") as f:
             f.write(data)
+        self._known_objects.add(sha)
 
     def add(self, path: str) -> None:
         """
@@ -174,10 +409,10 @@ class BasicGit:
             return
 
         # --- Task 2.2: Write the absolute path to the index file ---
-        # Open the index file and write the absolute path of the staged file into it.
+        # Write the absolute path of the staged file into the index file.
+        # Hint: use 'self._write_small()', which takes the content as bytes.
         try:
-            with open(None, "w") as f: # YOUR CODE HERE
-                f.write(None) # YOUR CODE HERE
+            self._write_small(None, None) # YOUR CODE HERE
         except Exception as e:
             raise NotImplementedError(
                 f"Task 2.2: Writing the path to the index file encountered an error: {e}"
@@ -198,9 +433,9 @@ class BasicGit:
         """
         # Check if there's anything staged to commit by reading the index file
         try:
-            with open(self.index_file, "r") as f:
-                # Read the content of the index file and remove any leading/trailing whitespace
-                staged_path = f.read().strip()
+            # Read the raw bytes of the index file, then decode them and remove any
+            # leading/trailing whitespace
+            staged_path = self._read_small(self.index_file).decode("utf-8").strip()
         except FileNotFoundError:
             print("No changes staged for commit. The staging area is empty or missing.")
             return
@@ -209,47 +444,52 @@ class BasicGit:
             print("No changes to commit")
             return
 
-        abs_staged_path = os.path.abspath(staged_path)
-        if not os.path.exists(abs_staged_path):
+        # 'add' already stored the absolute path, so it can be opened as-is
+        try:
+            src = open(staged_path, "rb")
+        except FileNotFoundError:
             print(f"Staged file '{staged_path}' not found. Clearing the index.")
             # Clear the index
-            with open(self.index_file, "w") as f:
-                f.write("")
+            os.truncate(self.index_file, 0)
             return
 
-        with open(abs_staged_path, "r") as f:
-            content = f.read()
-        # Create a "blob" by hashing the content
-        blob_sha = self._hash_object(content)
-        self._store_object(content, blob_sha)  # save the content
+        # Create a "blob" by hashing and saving the file's bytes in one pass
+        with src:
+            blob_sha = self._hash_and_store_file(src)
 
-        # Create a commit object with message, timestamp, and file information
-        commit_data = {
-            "message": message,
-            "timestamp": int(time.time()),
-            "file": {staged_path: blob_sha},
-        }
+        # Describe the commit as one "<field> <value>" line per field. Unlike
+        # the repr of a Python dict, this layout is fixed, so the same commit
+        # always produces the same bytes (and the same hash). The message goes
+        # last so that a multi-line message can't be mistaken for a field.
+        commit_lines = [
+            f"time {time.time_ns() // 1_000_000_000}",  # whole seconds, no float
+            f"file {staged_path} {blob_sha}",
+            f"message {message}",
+        ]
 
         # --- Task 5.1: Represent and store the commit ---
-        # Obtain a string representation of the commit data. Generate a unique
-        # identifier for this string using a hashing function.
-        commit_string = None # YOUR CODE HERE - Get string representation of commit_data
-        if commit_string is None:
-            raise NotImplementedError("Task 5.1: Getting string representation of commit data is not implemented.")
-
-        commit_sha = None # YOUR CODE HERE - Hash the commit string
+        # Join 'commit_lines' with newline characters and encode the result to
+        # bytes using UTF-8. Generate a unique identifier for these bytes using
+        # a hashing function.
+        commit_bytes = None # YOUR CODE HERE - Join and encode commit_lines
+        if commit_bytes is None:
+            raise NotImplementedError("Task 5.1: Building the commit bytes is not implemented.")
+
+        commit_sha = None # YOUR CODE HERE - Hash the commit bytes
         if commit_sha is None:
-            raise NotImplementedError("Task 5.1: Hashing the commit string is not implemented.")
+            raise NotImplementedError("Task 5.1: Hashing the commit bytes is not implemented.")
 
-        self._store_object(commit_string, commit_sha)  # save the commit string and hash
+        self._store_object(commit_bytes, commit_sha)  # save the commit bytes and hash
 
         # --- Task 5.2: Update the branch pointer ---
-        # Construct the reference to the current branch. Open this reference
-        # and update it to point to the newly created commit.
-        main_branch_path = os.path.join(None, None) # YOUR CODE HERE - Construct branch reference path
+        # Open the reference to the current branch (its path is built once in the
+        # __init__ method) and update it to point to the newly created commit.
+        # Hint: use 'self._replace_small()' rather than 'self._write_small()', so a
+        # crash halfway through never leaves the branch pointing at nothing.
         try:
-            with open(None, "w") as f: # YOUR CODE HERE - Open branch reference for writing
-                f.write(None)  # YOUR CODE HERE - Write the new commit hash
+            self._replace_small(None, None)  # YOUR CODE HERE - Write the new commit hash
+        except FileExistsError:
+            raise  # another process holds the branch's lock file
         except Exception as e:
             raise NotImplementedError(f"Task 5.2: Updating the branch pointer encountered an error: {e}")
 
@@ -257,43 +497,56 @@ class BasicGit:
         print(f"[{self.main_branch} {commit_sha[:7]}] {message}")
 
         # --- Task 5.3: Clear the staging area ---
-        # Open the index file and write an empty string to clear it.
+        # Clear the index file by truncating it to a length of 0 with 'os.truncate()'.
         try:
-            with open(None, "w") as f: # YOUR CODE HERE - Open index file for writing
-                f.write("") # Clear index by writing empty string
+            os.truncate(None, 0) # YOUR CODE HERE - Replace None with the index file
         except Exception as e:
             raise NotImplementedError(f"Task 5.3: Clearing the staging area encountered an error: {e}")
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(
-        description="A basic Git-like tool (v1 - single file tracking)"
-    )
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
-
-    init_parser = subparsers.add_parser("init", help="Initialize a new repository")
-
-    add_parser = subparsers.add_parser("add", help="Add file to be tracked")
-    add_parser.add_argument("path", help="Path to the file")
-
-    commit_parser = subparsers.add_parser(
-        "commit", help="Record changes to the repository with a message."
-    )
-    commit_parser.add_argument("message", help="Commit message")
-
-    args = parser.parse_args()
-
-    basic_git = BasicGit()
-
-    if args.command == "init":
-        basic_git.init()
-    elif args.command == "add":
-        basic_git.add(args.path)
-    elif args.command == "commit":
-        basic_git.commit(args.message)
-    elif args.command is None:
-        parser.print_help()
-        sys.exit(1)
+    # Well-formed commands are run straight from 'sys.argv', so the common case
+    # doesn't pay for importing argparse and building its parsers. Anything else
+    # (no command, --help, typos, missing arguments) falls through to argparse,
+    # which prints the proper usage and error messages.
+    argv = sys.argv[1:]
+    if argv == ["init"]:
+        BasicGit().init()
+    elif len(argv) == 2 and argv[0] == "add" and not argv[1].startswith("-"):
+        BasicGit().add(argv[1])
+    elif len(argv) == 2 and argv[0] == "commit" and not argv[1].startswith("-"):
+        BasicGit().commit(argv[1])
     else:
-        print(f"Unknown command: {args.command}")
-        sys.exit(1)
+        import argparse
+
+        parser = argparse.ArgumentParser(
+            description="A basic Git-like tool (v1 - single file tracking)"
+        )
+        subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+        init_parser = subparsers.add_parser("init", help="Initialize a new repository")
+
+        add_parser = subparsers.add_parser("add", help="Add file to be tracked")
+        add_parser.add_argument("path", help="Path to the file")
+
+        commit_parser = subparsers.add_parser(
+            "commit", help="Record changes to the repository with a message."
+        )
+        commit_parser.add_argument("message", help="Commit message")
+
+        args = parser.parse_args()
+
+        basic_git = BasicGit()
+
+        if args.command == "init":
+            basic_git.init()
+        elif args.command == "add":
+            basic_git.add(args.path)
+        elif args.command == "commit":
+            basic_git.commit(args.message)
+        elif args.command is None:
+            parser.print_help()
+            sys.exit(1)
+        else:
+            print(f"Unknown command: {args.command}")
+            sys.exit(1)
@@ -1,13 +1,47 @@
-import argparse
 import hashlib
+import io
 import json
+import mmap
 import os
 import sys
+import tempfile
 import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 
 class BasicGit:
+    # An empty SHA-1 hasher, set up once. Copying it with '.copy()' is cheaper
+    # than creating a brand-new hasher for every object we hash. We only use
+    # SHA-1 as a content ID, so 'usedforsecurity=False' keeps hashlib on its
+    # fast OpenSSL-backed implementation even on security-restricted systems.
+    _SHA1_TEMPLATE = hashlib.sha1(usedforsecurity=False)
+    # The start of every object header ('<type> <size>\0'), already as bytes.
+    # There are only two object types, so there is no need to format and
+    # encode the type name again for every object.
+    _HEADER_PREFIXES = {"blob": b"blob ", "commit": b"commit "}
+    # One JSON encoder, set up once instead of on every 'json.dumps' call. Sorted
+    # keys and compact separators give one canonical encoding, so the same
+    # commit always hashes the same way.
+    _JSON_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+
+    # Every attribute set in __init__ is listed here, so instances store them in
+    # fixed slots instead of a per-instance '__dict__'. Add new attributes here too.
+    __slots__ = (
+        "root_path",
+        "gitdir",
+        "refs_dir",
+        "heads_dir",
+        "HEAD_file",
+        "main_branch",
+        "main_branch_path",
+        "objects_dir",
+        "index_file",
+        "stat_cache_file",
+        "_known_shards",
+        "_stat_cache",
+    )
+
     def __init__(self, root_path="."):
         """
         Set up a Git-like system to track changes to files.
@@ -29,12 +63,20 @@ class BasicGit:
             self.gitdir, "HEAD"
         )  # file indicating the currently active branch
         self.main_branch = "main"  # the default name for the initial branch
+        self.main_branch_path = os.path.join(
+            self.heads_dir, self.main_branch
+        )  # file storing the latest commit on the main branch, built once and reused
         self.objects_dir = os.path.join(
             self.gitdir, "objects"
         )  # directory to store all committed objects
         self.index_file = os.path.join(
             self.gitdir, "index"
         )  # file to (temporarily) track staged files
+        self.stat_cache_file = os.path.join(
+            self.gitdir, "stat_cache"
+        )  # file remembering the blob hash of files that haven't changed since they were last committed
+        self._known_shards = set()  # two-character object folders known to exist
+        self._stat_cache = None  # contents of the stat cache file, loaded by 'commit'
 
     def init(self) -> None:
         """
@@ -44,14 +86,18 @@ class BasicGit:
         to begin tracking changes in the current directory. This version uses a
         symbolic HEAD reference, which is a step towards supporting branching.
         """
-        if os.path.exists(self.gitdir):
+        try:
+            # Creating the main folder fails if it is already there, so this
+            # one step both checks for and starts a new repository
+            os.mkdir(self.gitdir)
+        except FileExistsError:
             print(f"Repository already exists at {self.gitdir}")
             return
 
         # Create all the folders we need to store Git data
-        os.makedirs(self.gitdir, exist_ok=True)
-        os.makedirs(self.objects_dir, exist_ok=True)
+        # (creating heads_dir also creates the repository and refs folders above it)
         os.makedirs(self.heads_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
 
         # --- Task 1: Create a symbolic HEAD reference ---
         # Create a 'HEAD' file in the repository's directory.
@@ -60,96 +106,207 @@ class BasicGit:
         # head reference of the main branch. The format for a symbolic
         # reference starts with 'ref:' followed by the path to the
         # referenced file.
-        with open(None, "w") as f: # YOUR CODE HERE - Replace None
-            f.write(None) # YOUR CODE HERE - Replace None
+        # Hint: use 'self._write_small()', which takes the content as bytes.
+        self._write_small(None, None) # YOUR CODE HERE - Replace None
 
         # Create an empty main branch file
-        main_branch_path = os.path.join(self.heads_dir, self.main_branch)
-        with open(main_branch_path, "w") as f:
-            f.write("")  # Start with no commits
+        self._write_small(self.main_branch_path, b"")  # Start with no commits
 
         # Create an empty index file to track staged files
-        with open(self.index_file, "w") as f:
-            f.write("")
+        self._write_small(self.index_file, b"")
 
         print(f"Initialized empty repository in {self.gitdir}")
 
-    def _hash_object(self, data: str, obj_type: str = "blob") -> str:
+    def _write_small(self, path: str, data: bytes) -> None:
         """
-        Generate a unique ID (SHA-1 hash) for the provided data, including its type.
+        Write a few bytes to a file, replacing anything already in it.
 
-        This private helper method takes string data and an object type,
-        constructs a content string that includes the type and length of the
-        data, encodes it, and then computes its SHA-1 hash. This ensures that
-        objects of different types with the same content have different IDs.
+        The repository's bookkeeping files (HEAD, branch references and the
+        index) only ever hold a short line of text. This private helper writes
+        them with 'os.open' and 'os.write' directly, skipping the buffering and
+        text-encoding layers that 'open()' sets up for every file.
 
         Args:
-            data (str): The string data to be hashed.
-            obj_type (str, optional): The type of the object ('blob' or 'commit').
-                Defaults to "blob".
+            path (str): The path to the file to be written.
+            data (bytes): The bytes to write into the file.
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(path, flags, 0o644)
+        try:
+            self._write_all(fd, data)
+        finally:
+            os.close(fd)
+
+    def _write_all(self, fd: int, data: bytes) -> None:
+        """
+        Write every byte of 'data' to an open file descriptor.
+
+        'os.write' is allowed to write fewer bytes than it was given (for
+        example when a signal interrupts it) and returns how many it managed.
+        This private helper keeps calling it with the rest until nothing is
+        left, so a file is never silently cut short.
+
+        Args:
+            fd (int): A file descriptor opened for writing.
+            data (bytes): The bytes to write.
+        """
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+
+    def _read_small(self, path: str) -> bytes:
+        """
+        Read the whole of a small file as bytes.
+
+        This is the reading counterpart of '_write_small': one 'os.open', one
+        'os.read' sized from the file's length, and one 'os.close', with no
+        buffering or text-decoding layers in between.
+
+        Args:
+            path (str): The path to the file to be read.
 
         Returns:
-            str: The hexadecimal representation of the SHA-1 hash.
+            bytes: The file's contents.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
         """
-        # --- Task 3.1: Encode data to bytes ---
-        # The 'hashlib' library requires bytes. Encode the input 'data' using UTF-8
-        # and store the result in 'encoded_data'.
-        encoded_data = None  # convert the text to computer-friendly format # YOUR CODE HERE
-        if encoded_data is None:
-            raise NotImplementedError(
-                "Task 3.1: Encode the data to bytes using UTF-8."
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            return os.read(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+
+    def _replace_small(self, path: str, data: bytes) -> None:
+        """
+        Replace a small file all at once, so readers never see it half-written.
+
+        The new bytes go to a '.lock' file next to the target first, and
+        'os.replace' then swaps it into place in one step. If the program stops
+        part-way, the old file is still intact (real Git updates its branch
+        references the same way). The lock file is created with 'os.O_EXCL',
+        so while one process holds it, another one trying to update the same
+        file fails instead of silently overwriting its work.
+
+        Args:
+            path (str): The path to the file to be replaced.
+            data (bytes): The bytes the file should contain.
+
+        Raises:
+            FileExistsError: If the '.lock' file already exists, because
+                another process is updating the same file (or one crashed
+                and left its lock file behind).
+        """
+        lock_path = f"{path}.lock"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+        try:
+            fd = os.open(lock_path, flags, 0o644)
+        except FileExistsError:
+            raise FileExistsError(
+                f"Unable to create '{lock_path}': another process seems to be "
+                "updating it. If not, remove the file and try again."
             )
+        try:
+            self._write_all(fd, data)
+        except BaseException:
+            os.close(fd)
+            os.remove(lock_path)  # release the lock
+            raise
+        os.close(fd)
+        os.replace(lock_path, path)
+
+    def _object_header(self, obj_type: str, size: int) -> bytes:
+        """
+        Build the header that goes in front of an object's content.
+
+        Both hashing and storing an object start with this header, whether the
+        content is already in memory or is read from a file piece by piece.
 
-        # --- Task 3.2: Construct the header ---
-        # Create the header string by formatting the object type and the length of
-        # the encoded data, and then encode this header string to bytes using UTF-8.
-        # Store the result in 'header'.
+        Args:
+            obj_type (str): The type of the object ('blob' or 'commit').
+            size (int): The length of the object's content in bytes.
+
+        Returns:
+            bytes: The header, for example b"blob 12\\0".
+        """
+        # --- Task 3.1: Construct the header ---
+        # Build the header bytes: the object type, a space, the content's length
+        # ('size') and a null byte (for example b"blob 12\0"). Store the result
+        # in 'header'.
+        # Hint: take the ready-made prefix for 'obj_type' from
+        # 'self._HEADER_PREFIXES' and add the length with bytes formatting,
+        # 'b"%d\0" % size', so no text has to be built and encoded.
         header = None # YOUR CODE HERE
         if header is None:
             raise NotImplementedError(
-                "Task 3.2: Construct the header string and encode it to bytes."
+                "Task 3.1: Construct the header string and encode it to bytes."
             )
+        return header
+
+    def _hash_object(self, data: bytes, obj_type: str = "blob") -> str:
+        """
+        Generate a unique ID (SHA-1 hash) for the provided data, including its type.
+
+        This private helper method takes raw bytes and an object type,
+        constructs a header that includes the type and length of the data,
+        and then feeds the header followed by the data into a SHA-1 hasher.
+        This ensures that objects of different types with the same content
+        have different IDs.
 
-        # --- Task 3.3: Concatenate header and encoded data ---
-        # Concatenate the 'header' and 'encoded_data' to form the complete data to be hashed.
-        # Store the result in 'store'.
-        store = None # YOUR CODE HERE
-        if store is None:
+        Args:
+            data (bytes): The bytes to be hashed.
+            obj_type (str, optional): The type of the object ('blob' or 'commit').
+                Defaults to "blob".
+
+        Returns:
+            str: The hexadecimal representation of the SHA-1 hash.
+        """
+        header = self._object_header(obj_type, len(data))
+
+        # --- Task 3.2: Feed the header and data to a SHA-1 hasher ---
+        # Make a SHA-1 hasher by calling '.copy()' on 'self._SHA1_TEMPLATE', then
+        # feed it the 'header' and then the 'data' with two '.update()' calls.
+        # Hint: the hash is the same as for 'header + data', but gluing them
+        # together first would copy all of 'data' into a new bytes object.
+        hash_object = self._SHA1_TEMPLATE.copy()
+        try:
+            hash_object.update(None)  # YOUR CODE HERE - Feed the header first
+            hash_object.update(None)  # YOUR CODE HERE - Then feed the data
+        except TypeError:
             raise NotImplementedError(
-                "Task 3.3: Concatenate the header and encoded data."
+                "Task 3.2: Feed the header and data to the hasher."
             )
 
-        # --- Task 3.4: Compute SHA-1 hash as hexadecimal ---
-        # Use 'hashlib.sha1()' to hash 'store'. Then, get the hex digest
-        # using '.hexdigest()' and store it in 'hex_hash'.
-        hash_object = None # YOUR CODE HERE
+        # --- Task 3.3: Compute SHA-1 hash as hexadecimal ---
+        # Get the hex digest of 'hash_object' using '.hexdigest()' and store it
+        # in 'hex_hash'.
         hex_hash = None  # create a unique fingerprint for this content # YOUR CODE HERE
         if hex_hash is None:
             raise NotImplementedError(
-                "Task 3.4: Compute the SHA-1 hash and return its hexadecimal representation."
+                "Task 3.3: Compute the SHA-1 hash and return its hexadecimal representation."
             )
         return hex_hash
 
-    def _store_object(self, data: str, sha: str, obj_type: str = "blob") -> None:
+    def _object_paths(self, sha: str) -> tuple[str, str]:
         """
-        Store data in the object database using its SHA-1 hash, with compression.
+        Work out where an object is stored in the object database.
 
-        This private helper method saves the provided data into a compressed
-        file within the repository's object directory. The file's name is based
-        on the SHA-1 hash of the data, and the objects are organized into
-        subdirectories based on the first two characters of the hash for
-        efficiency. The stored data is prefixed with its type and length and
-        then compressed using zlib.
+        Objects are organized into subdirectories named after the first two
+        characters of their hash, and the rest of the hash is the file name.
 
         Args:
-            data (str): The string data to be stored.
-            sha (str): The SHA-1 hash of the data, used as the filename.
-            obj_type (str, optional): The type of the object ('blob' or 'commit').
-                Defaults to "blob".
+            sha (str): The SHA-1 hash of the object.
+
+        Returns:
+            tuple[str, str]: The object's directory ('objects/xx') and the
+                full path of its file ('objects/xx/yyyy...').
         """
         # --- Task 4.1: Construct the object directory path ---
         # Use 'self.objects_dir' and the first two characters of 'sha' to
         # create the directory path where the object will be stored.
+        # Hint: the hash only contains hex characters, so gluing the parts together
+        # with 'os.sep' in an f-string is enough - 'os.path.join' does extra work
+        # we don't need here.
         obj_dir = None # YOUR CODE HERE
         if obj_dir is None:
             raise NotImplementedError("Task 4.1: Constructing the object directory path is not implemented.")
@@ -160,54 +317,353 @@ class BasicGit:
         obj_path = None # YOUR CODE HERE
         if obj_path is None:
             raise NotImplementedError("Task 4.2: Constructing the object file path is not implemented.")
+        return obj_dir, obj_path
+
+    def _ensure_shard(self, obj_dir: str, shard: str) -> None:
+        """
+        Make sure an object folder ('objects/xx') exists.
 
-        os.makedirs(obj_dir, exist_ok=True)  # create the folder if it doesn't exist
+        There are only 256 possible two-character folders, so after the first
+        object lands in a folder, later objects can skip the file system call
+        that would create it.
+
+        Args:
+            obj_dir (str): The full path of the object folder.
+            shard (str): The folder name (the first two characters of a hash).
+        """
+        if shard not in self._known_shards:
+            os.makedirs(obj_dir, exist_ok=True)
+            self._known_shards.add(shard)
+
+    def _store_object(self, data: bytes, sha: str, obj_type: str = "blob") -> None:
+        """
+        Store data in the object database using its SHA-1 hash, with compression.
+
+        This private helper method saves the provided data into a compressed
+        file within the repository's object directory. The file's name is based
+        on the SHA-1 hash of the data, and the objects are organized into
+        subdirectories based on the first two characters of the hash for
+        efficiency. The stored data is prefixed with its type and length and
+        then compressed using zlib.
+
+        Args:
+            data (bytes): The bytes to be stored.
+            sha (str): The SHA-1 hash of the data, used as the filename.
+            obj_type (str, optional): The type of the object ('blob' or 'commit').
+                Defaults to "blob".
+        """
+        obj_dir, obj_path = self._object_paths(sha)
+        if os.path.exists(obj_path):
+            return  # same content is already stored, skip compressing it again
+
+        self._ensure_shard(obj_dir, sha[:2])  # create the folder if it doesn't exist
 
         # --- Task 4.3: Compress the data with header ---
         # Construct the data to be stored by prepending a header containing the object
         # type and data length, separated by a null byte.  Compress this data using
         # 'zlib.compress()' and store the result in 'compressed_data'.
+        # Remember that 'data' is bytes: build the header with 'self._object_header()',
+        # just like '_hash_object' does.
+        # Hint: pass a compression level of 1 (the same level Git uses for loose
+        # objects). It is several times faster than the default level of 6 and
+        # still shrinks text files nearly as well. Decompression works the same
+        # for any level, so '_read_object' doesn't need to change.
         compressed_data = None # YOUR CODE HERE
         if compressed_data is None:
             raise NotImplementedError("Task 4.3: Compressing the data with a header is not implemented.")
 
         # --- Task 4.4: Write the compressed data to the object file ---
-        # Open the file specified by 'obj_path' in binary write mode ('wb') and
-        # write the compressed data ('compressed_data') to the file.
+        # Create the file specified by 'obj_path' with 'os.open()' using the flags
+        # below, then write the compressed data ('compressed_data') to it with
+        # 'self._write_all()', which keeps writing until every byte is in the
+        # file. 'os.O_EXCL' only creates a brand-new file: if another process
+        # stored the same object in the meantime, 'os.open()' raises
+        # 'FileExistsError', and since the content is identical we can stop.
         # No return value
-        with open(None, "wb") as f: # YOUR CODE HERE
-            f.write(None) # YOUR CODE HERE
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+        try:
+            fd = os.open(None, flags, 0o644) # YOUR CODE HERE
+        except FileExistsError:
+            return  # the same object was stored by someone else first
+        except TypeError as e:
+            raise NotImplementedError(
+                f"Task 4.4: Creating the object file encountered an error: {e}"
+            )
+        try:
+            self._write_all(fd, None) # YOUR CODE HERE
+        except Exception as e:
+            # Never leave a half-written object behind under its real name
+            os.close(fd)
+            os.remove(obj_path)
+            if isinstance(e, TypeError):
+                raise NotImplementedError(
+                    f"Task 4.4: Writing the object file encountered an error: {e}"
+                )
+            raise
+        os.close(fd)
+
+    def _hash_and_store_file(
+        self, src: io.BufferedIOBase, size: int | None = None
+    ) -> str:
+        """
+        Hash a file and store it as a compressed blob object in a single pass.
+
+        This private helper method produces the same hash and stored bytes as
+        '_hash_object' and '_store_object' would for the file's contents, but
+        without ever holding the whole file in memory. It builds the header and
+        the object path with the same helpers they use ('_object_header' and
+        '_object_paths'). The file is read in
+        binary mode, one fixed-size chunk at a time, and each chunk is fed into
+        the SHA-1 hasher and the zlib compressor together. The compressed
+        output goes to a temporary file inside the object directory, which is
+        renamed to its final object path once the hash is known (or discarded
+        if that object already exists).
+
+        Large files are memory-mapped instead, so their pages are hashed and
+        compressed without being copied into a buffer first. They are hashed
+        before anything is compressed, so a large file whose object is already
+        stored is never compressed at all.
+
+        Args:
+            src (io.BufferedIOBase): The file to be stored, opened in binary mode.
+            size (int | None, optional): The file's size in bytes, if the caller
+                already has it from 'os.stat'. Defaults to None, which looks it
+                up with 'os.fstat'.
 
-    def _read_object(self, sha: str) -> tuple[str, str]:
+        Returns:
+            str: The hexadecimal representation of the SHA-1 hash.
+
+        Raises:
+            RuntimeError: If the file was written to while being stored (its
+                length no longer matches 'size', or its content changed between
+                hashing and compressing). Nothing is stored then.
+        """
+        if size is None:
+            size = os.fstat(src.fileno()).st_size
+        header = self._object_header("blob", size)
+        hasher = self._SHA1_TEMPLATE.copy()
+        hasher.update(header)
+        chunk_size = 1 << 20  # 1 MiB
+        if size > chunk_size:
+            # Map the whole file into memory. Hashing it in one go is cheap next
+            # to compressing it, so the hash comes first, and an object that is
+            # already stored is never compressed at all
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) != size:
+                    raise RuntimeError("the file changed while it was being stored")
+                hasher.update(mapped)
+                sha = hasher.hexdigest()
+                obj_dir, obj_path = self._object_paths(sha)
+                if os.path.exists(obj_path):
+                    return sha  # same content is already stored
+                compressor = zlib.compressobj(self._pick_level(mapped))
+                # The mapping shows the file as it is now, so a write between the
+                # two passes would store content that doesn't match 'sha'. Hash
+                # what is actually compressed as well, and compare at the end
+                recheck = self._SHA1_TEMPLATE.copy()
+                recheck.update(header)
+                with tempfile.NamedTemporaryFile(
+                    dir=self.objects_dir, delete=False
+                ) as tmp:
+                    tmp.write(compressor.compress(header))
+                    # The compressor reads slices straight from the file's pages
+                    with memoryview(mapped) as view:
+                        for start in range(0, len(view), chunk_size):
+                            chunk = view[start : start + chunk_size]
+                            recheck.update(chunk)
+                            tmp.write(compressor.compress(chunk))
+                            chunk.release()
+                    tmp.write(compressor.flush())
+                if recheck.hexdigest() != sha:
+                    os.remove(tmp.name)
+                    raise RuntimeError("the file changed while it was being stored")
+        else:
+            buffer = bytearray(chunk_size)  # reused for every chunk
+            view = memoryview(buffer)
+            n = src.readinto(buffer)
+            compressor = zlib.compressobj(self._pick_level(view[:n]))
+            total = 0  # bytes hashed so far, to check against the header's size
+            with tempfile.NamedTemporaryFile(dir=self.objects_dir, delete=False) as tmp:
+                tmp.write(compressor.compress(header))
+                # Keep filling the buffer until the end of the file is reached
+                while n:
+                    hasher.update(view[:n])
+                    tmp.write(compressor.compress(view[:n]))
+                    total += n
+                    n = src.readinto(buffer)
+                tmp.write(compressor.flush())
+            if total != size:
+                # The header promised a different size, so the object would be broken
+                os.remove(tmp.name)
+                raise RuntimeError("the file changed while it was being stored")
+            sha = hasher.hexdigest()
+            try:
+                obj_dir, obj_path = self._object_paths(sha)
+            except NotImplementedError:
+                os.remove(tmp.name)  # don't leave the temporary file behind
+                raise
+            if os.path.exists(obj_path):
+                # Same content is already stored, so there is nothing to keep
+                os.remove(tmp.name)
+                return sha
+        self._ensure_shard(obj_dir, sha[:2])
+        # Temporary files are private to their owner; give the object the same
+        # permissions as the other repository files, then move it into place
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, obj_path)
+        return sha
+
+    def _pick_level(self, sample: bytes | memoryview | mmap.mmap) -> int:
+        """
+        Choose the zlib compression level for a blob from a sample of its start.
+
+        Files that are already compressed (images, archives, video) hardly
+        shrink at all, yet compressing them still costs the full price. For
+        those, level 0 is used: zlib then just wraps the bytes as they are,
+        which is many times faster. The stored object stays an ordinary zlib
+        stream, so reading it back works the same.
+
+        Args:
+            sample (bytes | memoryview | mmap.mmap): The start of the file's
+                content (only the first 4 KiB are looked at).
+
+        Returns:
+            int: 0 for content that barely compresses, otherwise 1.
+        """
+        probe = sample[:4096]  # small enough to cost little next to the real work
+        if len(probe) == 4096 and len(zlib.compress(probe, 1)) > len(probe) * 0.95:
+            return 0
+        return 1
+
+    def _store_staged_file(self, staged_path: str, racy_after_ns: int) -> str:
+        """
+        Open a staged file and store it as a blob object.
+
+        A relative path is opened against the current directory, exactly where
+        'os.path.abspath' would have resolved it. Before the file is read, its
+        modification time, size, inode number and change time are compared
+        with the stat cache: if they match what was recorded the last time the
+        file was committed, and that blob is still in the object database, the
+        content hasn't changed and the recorded blob hash is reused without
+        reading, hashing or compressing the file again.
+
+        Args:
+            staged_path (str): The path of the staged file, as listed in the index.
+            racy_after_ns (int): Files modified at or after this time (in
+                nanoseconds) are not recorded in the stat cache, because a
+                change made within the same clock tick would not alter their
+                modification time.
+
+        Returns:
+            str: The SHA-1 hash of the stored blob.
+
+        Raises:
+            FileNotFoundError: If the staged file no longer exists.
+        """
+        st = os.stat(staged_path)
+        key = os.path.abspath(staged_path)
+        # The change time can't be set by hand the way the modification time
+        # can, so it catches edits that restore the old modification time
+        signature = [st.st_mtime_ns, st.st_size, st.st_ino, st.st_ctime_ns]
+        cached = self._stat_cache.get(key)
+        if cached is not None and cached[:4] == signature:
+            sha = cached[4]
+            if os.path.exists(self._object_paths(sha)[1]):
+                return sha  # unchanged since it was last stored
+            # The blob has gone, so store it again. Another thread may be
+            # handling the same file, so the entry might already be gone too
+            self._stat_cache.pop(key, None)
+        with open(staged_path, "rb") as f:
+            # Create a "blob" by hashing and saving the file in one pass, reusing
+            # the size we already have instead of asking the file system again
+            blob_sha = self._hash_and_store_file(f, st.st_size)
+        if st.st_mtime_ns < racy_after_ns:
+            self._stat_cache[key] = signature + [blob_sha]
+        return blob_sha
+
+    def _try_store_staged_file(
+        self, staged_path: str, racy_after_ns: int
+    ) -> str | Exception:
+        """
+        Store a staged file like '_store_staged_file', but return any error.
+
+        Handing the error back instead of raising it lets 'commit' report a
+        problem with one file and still commit the others.
+
+        Args:
+            staged_path (str): The path of the staged file, as listed in the index.
+            racy_after_ns (int): Passed on to '_store_staged_file'.
+
+        Returns:
+            str | Exception: The SHA-1 hash of the stored blob, or the
+                exception that stopped the file from being stored.
+        """
+        try:
+            return self._store_staged_file(staged_path, racy_after_ns)
+        except Exception as e:
+            return e
+
+    def _load_stat_cache(self) -> None:
+        """
+        Load the stat cache file into 'self._stat_cache'.
+
+        The cache maps the absolute path of each committed file to its
+        modification time, size, inode number and change time, followed by its
+        blob hash. A missing or unreadable cache file simply starts an empty
+        cache, since every entry can be rebuilt by hashing the file again.
+        """
+        try:
+            self._stat_cache = json.loads(self._read_small(self.stat_cache_file))
+        except (FileNotFoundError, ValueError):
+            self._stat_cache = {}
+
+    def _save_stat_cache(self) -> None:
+        """
+        Write 'self._stat_cache' back to the stat cache file in one step.
+
+        If another process is saving the cache at the same moment, this save
+        is skipped: the cache only saves work, so losing an update is harmless.
+        """
+        try:
+            self._replace_small(
+                self.stat_cache_file,
+                self._JSON_ENCODER.encode(self._stat_cache).encode("utf-8"),
+            )
+        except FileExistsError:
+            pass
+
+    def _read_object(self, sha: str) -> tuple[str, bytes]:
         """
         Read and decompress an object from the object database.
 
         This private helper method retrieves a compressed object from the
         repository's object directory based on its SHA-1 hash. It decompresses
-        the object using zlib and parses the header to determine the object type
-        and original size.
+        the object using zlib and reads the object type from its header.
 
         Args:
             sha (str): The SHA-1 hash of the object to retrieve.
 
         Returns:
-            tuple[str, str]: A tuple containing the object type (e.g., 'blob', 'commit')
-                            and the decompressed content of the object as a string.
+            tuple[str, bytes]: A tuple containing the object type (e.g., 'blob', 'commit')
+                            and the decompressed content of the object as raw bytes.
 
         Raises:
             ValueError: If the object with the given SHA-1 hash is not found
                         in the object database.
         """
-        obj_path = os.path.join(self.objects_dir, sha[:2], sha[2:])
+        obj_path = f"{self.objects_dir}{os.sep}{sha[:2]}{os.sep}{sha[2:]}"
         if not os.path.exists(obj_path):
             raise ValueError(f"Object {sha} not found")
         with open(obj_path, "rb") as f:  # use binary read mode
             compressed = f.read()
-        decompressed = zlib.decompress(compressed).decode("utf-8")
-        null_index = decompressed.find("\0")
-        header = decompressed[:null_index]
+        # Keep the content as bytes: decoding it would scan the whole object and
+        # fail on binary files. Only the short header needs to become text
+        decompressed = zlib.decompress(compressed)
+        null_index = decompressed.find(b"\0")
+        # The header is '<type> <size>'. Only the type is needed, because the
+        # content is simply everything after the null byte
+        obj_type = decompressed[: decompressed.find(b" ", 0, null_index)].decode("ascii")
         content = decompressed[null_index + 1 :]
-        obj_type, size = header.split()
         return obj_type, content
 
     def add(self, paths: list[str] | str) -> None:
@@ -223,34 +679,61 @@ class BasicGit:
         """
         if not isinstance(paths, list):
             paths = [paths]
-        with open(self.index_file, "a") as f:
-            for path in paths:
-                abs_path = os.path.abspath(path)
-
-                # --- Task 2.1: Check if the absolute path exists ---
-                # Check if the file or directory specified by the absolute path ('abs_path') exists.
-                # If it does not exist, print an error message and continue to the next path.
-                path_exists = None # YOUR CODE HERE
-                if path_exists is None:
-                    raise NotImplementedError(
-                        "Task 2.1: Checking if the specified path exists is not implemented."
-                    )
-                if not path_exists:
-                    print(f"Error: {path} does not exist")
-                    continue
-
-                # --- Task 2.2: Append the original path to the index file ---
-                # Open the index file in append mode and write the *original* (not absolute)
-                # path to the file, followed by a newline character.
-                try:
-                    with open(None, "a") as f: # YOUR CODE HERE
-                        f.write(None) # YOUR CODE HERE
-                except Exception as e:
-                    raise NotImplementedError(
-                        f"Task 2.2: Appending the path to the index file encountered an error: {e}"
-                    )
-
+        # Files already in the index are not written again, so 'commit' never
+        # hashes the same file twice. They are compared by absolute path, so
+        # 'a' and './a' count as the same file
+        try:
+            index_text = self._read_small(self.index_file).decode("utf-8")
+        except FileNotFoundError:
+            index_text = ""
+        already_staged = {
+            os.path.abspath(line) for line in index_text.splitlines() if line
+        }
+        staged_lines = []  # index lines for the paths that exist
+        for path in paths:
+            abs_path = os.path.abspath(path)
+
+            # --- Task 2.1: Check if the absolute path exists ---
+            # Check if the file or directory specified by the absolute path ('abs_path') exists.
+            # If it does not exist, print an error message and continue to the next path.
+            path_exists = None # YOUR CODE HERE
+            if path_exists is None:
+                raise NotImplementedError(
+                    "Task 2.1: Checking if the specified path exists is not implemented."
+                )
+            if not path_exists:
+                print(f"Error: {path} does not exist")
+                continue
+            if abs_path in already_staged:
                 print(f"Added {path}")
+                continue
+
+            # --- Task 2.2: Collect the line for the index file ---
+            # Append the *original* (not absolute) path, followed by a newline
+            # character, to the 'staged_lines' list. All the lines are written to
+            # the index together once every path has been checked.
+            staged_lines.append(None) # YOUR CODE HERE
+            already_staged.add(abs_path)
+
+            print(f"Added {path}")
+
+        if not staged_lines:
+            return
+        try:
+            new_entries = "".join(staged_lines).encode("utf-8")
+        except TypeError as e:
+            raise NotImplementedError(
+                f"Task 2.2: Collecting the path for the index file encountered an error: {e}"
+            )
+        # Append everything in one write: it lands at the end of the file, so
+        # staging more files never rewrites the paths already in it
+        index_fd = os.open(
+            self.index_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        try:
+            self._write_all(index_fd, new_entries)
+        finally:
+            os.close(index_fd)
 
     def _get_current_commit(self) -> str | None:
         """
@@ -265,15 +748,13 @@ class BasicGit:
                         or None if the 'main' branch file does not exist
                         (e.g., in a newly initialized repository with no commits).
         """
-        # Get the full path to the 'main' branch file
-        main_branch_path = os.path.join(self.heads_dir, self.main_branch)
-        # Check if the 'main' branch file exists
-        if os.path.exists(main_branch_path):
-            # Open the 'main' branch file in read mode
-            with open(main_branch_path, "r") as f:
-                # Read the commit SHA from the file and strip leading/trailing whitespace
-                return f.read().strip()
-        return None
+        try:
+            # Read the commit SHA from the 'main' branch file and strip
+            # leading/trailing whitespace
+            sha = self._read_small(self.main_branch_path).decode("ascii").strip()
+        except FileNotFoundError:
+            return None  # the 'main' branch file does not exist yet
+        return sha
 
     def commit(self, message: str) -> None:
         """
@@ -292,8 +773,16 @@ class BasicGit:
         try:
             with open(self.index_file, "r") as f:
                 # Read all lines from the index file, strip whitespace from each,
-                # and keep only the non-empty lines (representing staged files)
-                staged_files = [line.strip() for line in f.readlines() if line.strip()]
+                # and keep only the non-empty lines (representing staged files).
+                # Different spellings of the same file ('a' and './a') are keyed
+                # by their absolute path, so each file is stored only once and
+                # keeps the first spelling, in the original order
+                staged_by_key = {}
+                for line in f:
+                    path = line.strip()
+                    if path:
+                        staged_by_key.setdefault(os.path.abspath(path), path)
+                staged_files = list(staged_by_key.values())
         except FileNotFoundError:
             print("No changes staged for commit. The staging area is empty or missing.")
             return
@@ -302,23 +791,38 @@ class BasicGit:
             print("No changes to commit")
             return
 
+        self._load_stat_cache()
+        # Files changed in the last two seconds are too fresh to trust their
+        # modification time (some file systems only keep it to the second)
+        racy_after_ns = time.time_ns() - 2_000_000_000
+        if len(staged_files) > 1:
+            # SHA-1 and zlib both release the GIL while they work, so several
+            # files can be hashed and compressed at once on separate threads
+            workers = min(len(staged_files), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(
+                    pool.map(
+                        self._try_store_staged_file,
+                        staged_files,
+                        [racy_after_ns] * len(staged_files),
+                    )
+                )
+        else:
+            outcomes = [self._try_store_staged_file(staged_files[0], racy_after_ns)]
+
         files_to_commit = {}
-        for staged_path in staged_files:
-            abs_staged_path = os.path.abspath(staged_path)
-            if not os.path.exists(abs_staged_path):
+        # The outcomes are in staging order, so messages and the commit's file
+        # list come out the same however the threads finished
+        for staged_path, outcome in zip(staged_files, outcomes):
+            if isinstance(outcome, FileNotFoundError):
                 print(
                     f"Staged file '{staged_path}' not found. Continuing with next file."
                 )
                 continue  # Skip missing files, process the rest
-            try:
-                with open(abs_staged_path, "r") as f:
-                    content = f.read()
-                # Create a "blob" by hashing the content
-                blob_sha = self._hash_object(content)
-                self._store_object(content, blob_sha)  # save the content
-                files_to_commit[staged_path] = blob_sha
-            except Exception as e:
-                print(f"Error processing file '{staged_path}': {e}")
+            if isinstance(outcome, Exception):
+                print(f"Error processing file '{staged_path}': {outcome}")
+                continue
+            files_to_commit[staged_path] = outcome
 
         if not files_to_commit:  # Check if any files were actually committed
             print("No valid files to commit.")
@@ -326,29 +830,37 @@ class BasicGit:
 
         commit_data = {
             "message": message,
-            "timestamp": int(time.time()),
+            "timestamp": time.time_ns() // 1_000_000_000,  # whole seconds, no float
             "files": files_to_commit,
             "parent": self._get_current_commit(),
         }
 
-        commit_string = json.dumps(commit_data)
-        # Hash the commit string
-        commit_sha = self._hash_object(commit_string, obj_type="commit")
+        commit_bytes = self._JSON_ENCODER.encode(commit_data).encode("utf-8")
+        # Hash the commit bytes
+        commit_sha = self._hash_object(commit_bytes, obj_type="commit")
         self._store_object(
-            commit_string, commit_sha, obj_type="commit"
-        )  # save the commit string and hash
+            commit_bytes, commit_sha, obj_type="commit"
+        )  # save the commit bytes and hash
 
         # Update the branch to point to this new commit
-        main_branch_path = os.path.join(self.heads_dir, self.main_branch)
-        with open(main_branch_path, "w") as f:
-            f.write(commit_sha)  # point the branch to the new commit
+        self._replace_small(
+            self.main_branch_path, commit_sha.encode("ascii")
+        )  # point the branch to the new commit
 
         # Show a confirmation message with the commit ID and message
         print(f"[{self.main_branch} {commit_sha[:7]}] {message}")
 
+        # Keep only the entries for this commit's files, so the cache doesn't
+        # grow with every path that was ever committed
+        self._stat_cache = {
+            key: self._stat_cache[key]
+            for key in staged_by_key
+            if key in self._stat_cache
+        }
+        self._save_stat_cache()
+
         # Clear the index after a successful commit
-        with open(self.index_file, "w") as f:
-            f.write("")
+        os.truncate(self.index_file, 0)
 
     def status(self) -> None:
         """
@@ -363,6 +875,8 @@ class BasicGit:
         # Read the index file to get the list of staged files.
         # If the index file doesn't exist, treat the staged list as empty.
         # Finally, print the staged files to the console.
+        # Hint: loop over the file object itself ('for line in f') rather than
+        # calling 'f.readlines()', which builds an extra list of every line first.
         try:
             with open(None, "r") as f: # YOUR CODE HERE
                 staged_files = None # YOUR CODE HERE
@@ -398,6 +912,7 @@ class BasicGit:
         try:
             # --- Task 6.1: Read the commit object ---
             # Use '_read_object' to retrieve the object type and content for the given hash.
+            # The content comes back as bytes, which 'json.loads()' accepts directly.
             obj_type, commit_content = None, None # YOUR CODE HERE
 
             # --- Task 6.2: Handle commit object ---
@@ -439,42 +954,64 @@ class BasicGit:
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(
-        description="A basic Git-like tool (v2 - multiple files, compression)"
-    )
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+    # Well-formed commands are run straight from 'sys.argv', so the common case
+    # doesn't pay for importing argparse and building its parsers. Anything else
+    # (no command, --help, typos, missing arguments) falls through to argparse,
+    # which prints the proper usage and error messages.
+    argv = sys.argv[1:]
+    if argv == ["init"]:
+        BasicGit().init()
+    elif argv == ["status"]:
+        BasicGit().status()
+    elif argv == ["log"]:
+        BasicGit().log()
+    elif (
+        len(argv) >= 2
+        and argv[0] == "add"
+        and not any(path.startswith("-") for path in argv[1:])
+    ):
+        BasicGit().add(argv[1:])
+    elif len(argv) == 2 and argv[0] == "commit" and not argv[1].startswith("-"):
+        BasicGit().commit(argv[1])
+    else:
+        import argparse
 
-    init_parser = subparsers.add_parser("init", help="Initialize a new repository")
+        parser = argparse.ArgumentParser(
+            description="A basic Git-like tool (v2 - multiple files, compression)"
+        )
+        subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
-    add_parser = subparsers.add_parser("add", help="Add file(s) to be tracked")
-    add_parser.add_argument("path", nargs="+", help="Path to the file(s) to add")
+        init_parser = subparsers.add_parser("init", help="Initialize a new repository")
 
-    commit_parser = subparsers.add_parser(
-        "commit", help="Record changes to the repository with a message."
-    )
-    commit_parser.add_argument("message", help="Commit message")
+        add_parser = subparsers.add_parser("add", help="Add file(s) to be tracked")
+        add_parser.add_argument("path", nargs="+", help="Path to the file(s) to add")
 
-    status_parser = subparsers.add_parser("status", help="Show the working tree status")
+        commit_parser = subparsers.add_parser(
+            "commit", help="Record changes to the repository with a message."
+        )
+        commit_parser.add_argument("message", help="Commit message")
 
-    log_parser = subparsers.add_parser("log", help="Show commit logs")
+        status_parser = subparsers.add_parser("status", help="Show the working tree status")
 
-    args = parser.parse_args()
+        log_parser = subparsers.add_parser("log", help="Show commit logs")
 
-    basic_git = BasicGit()
+        args = parser.parse_args()
 
-    if args.command == "init":
-        basic_git.init()
-    elif args.command == "add":
-        basic_git.add(args.path)
-    elif args.command == "commit":
-        basic_git.commit(args.message)
-    elif args.command == "status":
-        basic_git.status()
-    elif args.command == "log":
-        basic_git.log()
-    elif args.command is None:
-        parser.print_help()
-        sys.exit(1)
-    else:
-        print(f"Unknown command: {args.command}")
-        sys.exit(1)
+        basic_git = BasicGit()
+
+        if args.command == "init":
+            basic_git.init()
+        elif args.command == "add":
+            basic_git.add(args.path)
+        elif args.command == "commit":
+            basic_git.commit(args.message)
+        elif args.command == "status":
+            basic_git.status()
+        elif args.command == "log":
+            basic_git.log()
+        elif args.command is None:
+            parser.print_help()
+            sys.exit(1)
+        else:
+            print(f"Unknown command: {args.command}")
+            sys.exit(1)